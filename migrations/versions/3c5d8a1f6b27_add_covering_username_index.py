@@ -0,0 +1,34 @@
+"""add covering username index
+
+Revision ID: 3c5d8a1f6b27
+Revises: e7f9b4abaa2a
+Create Date: 2024-07-02 10:14:51.382614
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c5d8a1f6b27"
+down_revision: Union[str, None] = "e7f9b4abaa2a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_username_covering",
+        "users",
+        ["username"],
+        unique=True,
+        postgresql_include=["id", "is_active", "created_at", "updated_at"],
+    )
+    op.drop_index("ix_users_username", table_name="users")
+
+
+def downgrade() -> None:
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.drop_index("ix_users_username_covering", table_name="users")
@@ -0,0 +1,38 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import anyio
+import pytest
+
+from ums import database
+from ums.config import get_settings
+
+
+@pytest.mark.anyio
+async def test_keep_alive_survives_failed_pings(monkeypatch, caplog):
+    """Test that the keepalive task carries on after a ping fails."""
+    pinged = anyio.Event()
+    attempts = 0
+
+    @asynccontextmanager
+    async def connect():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            # what asyncpg raises when the server refuses new connections
+            raise ConnectionRefusedError
+        pinged.set()
+        yield AsyncMock()
+
+    monkeypatch.setattr(database, "engine", SimpleNamespace(connect=connect))
+    monkeypatch.setattr(get_settings(), "db_keepalive_interval", 0)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(database.keep_alive)
+        with anyio.fail_after(1):
+            await pinged.wait()
+        task_group.cancel_scope.cancel()
+
+    assert attempts == 3
+    assert caplog.text.count("Failed to ping the database") == 2
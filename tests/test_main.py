@@ -1,7 +1,14 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
 import pytest
 
 from fastapi import status
 
+from ums import database
+from ums.api import main
+
 
 @pytest.mark.anyio
 async def test_api_status(api_client):
@@ -25,3 +32,19 @@ async def test_delete_method_on_status_endpoint(api_client):
     response = await api_client.delete("/api/status")
     assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
     assert response.json() == {"detail": "Method Not Allowed"}
+
+
+@pytest.mark.anyio
+async def test_lifespan_disposes_engine_when_keep_alive_failed(monkeypatch):
+    async def keep_alive():
+        raise ConnectionRefusedError
+
+    engine = SimpleNamespace(dispose=AsyncMock())
+    monkeypatch.setattr(database, "keep_alive", keep_alive)
+    monkeypatch.setattr(database, "engine", engine)
+
+    with pytest.raises(ConnectionRefusedError):
+        async with main.lifespan(main.app):
+            await asyncio.sleep(0)
+
+    engine.dispose.assert_awaited_once()
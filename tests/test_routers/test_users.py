@@ -1,12 +1,95 @@
+import traceback
 from uuid import uuid4
+import anyio
+import orjson
 import pytest
 from fastapi import status
+from fastapi.responses import ORJSONResponse
 
 from ums import models, schemas
-from ums.config import settings
+from ums.api.routers.users import user_response
+from ums.config import get_settings
+from ums.crud import crud_user
 from httpx import AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 base_endpoint = "/api/users"
+users_adapter = TypeAdapter(list[schemas.User])
+
+# (case, username, password, expected status code)
+user_creation_cases = [
+    # Happy path tests
+    (
+        "valid_username_password_1",
+        "testuser",
+        "password123",
+        status.HTTP_201_CREATED,
+    ),
+    (
+        "valid_username_password_2",
+        "user",
+        "securepassword",
+        status.HTTP_201_CREATED,
+    ),
+    (
+        "valid_username_password_3",
+        "another.user",
+        "anotherpassword",
+        status.HTTP_201_CREATED,
+    ),
+    # Edge cases
+    (
+        "empty_username",
+        "",
+        "password123",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "empty_password",
+        "testuser5",
+        "",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "minimal_valid_username_short_password",
+        "abc",
+        "short",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "long_username_long_password",
+        "longusername",
+        "longpassword",
+        status.HTTP_201_CREATED,
+    ),
+    # Error cases
+    (
+        "invalid_username_format",
+        "ab",
+        "password123",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "short_password",
+        "kent",
+        "short",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "none_password",
+        "bruce",
+        None,
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+    (
+        "none_username",
+        None,
+        "password123",
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+    ),
+]
 
 
 @pytest.mark.anyio
@@ -22,12 +105,8 @@ class TestUserRetrievalEndpoints:
         assert response.status_code == status.HTTP_200_OK
         result = schemas.UserResponse(**response.json())
 
-        # ensure all the schema fields are present
-        assert "message" in result.model_dump()
-        assert "status_code" in result.model_dump()
-        assert "data" in result.model_dump()
-
-        # now let's check for the values
+        # the schema fields are all required, so checking their values also
+        # ensures they are present
         assert result.message == "User data retrieval successful"
         assert result.status_code == 200
         assert isinstance(result.data, list)
@@ -76,15 +155,24 @@ class TestUserRetrievalEndpoints:
         user_data = schemas.User(**data)
         assert user_data.id == user.id
 
-    # create 5 dummy users with the API and then retrieve them
-    async def test_retrieve_all_users(self, api_client: AsyncClient):
+    async def test_get_user_by_string_id(
+        self, session: AsyncSession, create_jdoe_user
+    ):
+        """
+        Test that a user can be looked up by the string form of their ID,
+        which the Uuid column type of SQLite cannot bind as is.
+        """
+        user = create_jdoe_user
+
+        found = await crud_user.get_by_id(user_id=str(user.id), db=session)
+        assert found.id == user.id
+
+    # seed 5 dummy users in the database and then retrieve them
+    async def test_retrieve_all_users(
+        self, api_client: AsyncClient, make_users
+    ):
         """Test the retrieval of all users."""
-        for i in range(5):
-            response = await api_client.post(
-                base_endpoint,
-                json={"username": f"user_{i}", "password": f"password_{i}"},
-            )
-            assert response.status_code == status.HTTP_201_CREATED
+        await make_users(*({"username": f"user_{i}"} for i in range(5)))
 
         response = await api_client.get(base_endpoint)
         assert response.status_code == status.HTTP_200_OK
@@ -93,8 +181,8 @@ class TestUserRetrievalEndpoints:
         assert isinstance(data, list)
         assert len(data) == 5
 
-        for i, user_data in enumerate(data):
-            user = schemas.User(**user_data)
+        users = users_adapter.validate_python(data)
+        for i, user in enumerate(users):
             assert user.username == f"user_{i}"
 
     # test the retrieval of a user that does not exist
@@ -110,6 +198,29 @@ class TestUserRetrievalEndpoints:
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    async def test_not_found_error_traceback_stays_bounded(
+        self, api_client: AsyncClient
+    ):
+        """
+        Test that raising the shared 404 error over and over does not grow its
+        traceback, which would keep the frames of every request alive.
+        """
+
+        def traceback_length():
+            error = crud_user.not_found_error
+            return len(list(traceback.walk_tb(error.__traceback__)))
+
+        params = {"username": "nobody"}
+        response = await api_client.get(base_endpoint, params=params)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        length = traceback_length()
+
+        for _ in range(50):
+            response = await api_client.get(base_endpoint, params=params)
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        assert traceback_length() == length
+
     # test the retrieval of a user with an invalid ID
     async def test_retrieve_user_with_invalid_id(
         self, api_client: AsyncClient
@@ -169,7 +280,7 @@ class TestUserCreationEndpoint:
         detail = response.json().get("detail")
 
         min_length = detail[0].get("ctx").get("min_length")
-        assert min_length == settings.minimum_password_length
+        assert min_length == get_settings().minimum_password_length
 
     async def test_create_existing_user(self, api_client: AsyncClient):
         """Test the creation of a user that already exists"""
@@ -182,87 +293,15 @@ class TestUserCreationEndpoint:
         response = await api_client.post(base_endpoint, json=user_data)
         assert response.status_code == status.HTTP_409_CONFLICT
 
-    @pytest.mark.parametrize(
-        "username, password, expected",
-        [
-            # Happy path tests
-            ("testuser", "password123", status.HTTP_201_CREATED),
-            ("user", "securepassword", status.HTTP_201_CREATED),
-            (
-                "another.user",
-                "anotherpassword",
-                status.HTTP_201_CREATED,
-            ),
-            # Edge cases
-            (
-                "",
-                "password123",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # Empty username
-            (
-                "testuser5",
-                "",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # Empty password
-            (
-                "abc",
-                "short",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # Password too short
-            (
-                "longusername",
-                "longpassword",
-                status.HTTP_201_CREATED,
-            ),  # Long username and password
-            # Error cases
-            (
-                "ab",
-                "password123",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # Invalid username
-            (
-                "kent",
-                "short",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # Password too short
-            (
-                "bruce",
-                None,
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # None password
-            (
-                None,
-                "password123",
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-            ),  # None username
-        ],
-        ids=[
-            "valid_username_password_1",
-            "valid_username_password_2",
-            "valid_username_password_3",
-            "empty_username",
-            "empty_password",
-            "minimal_valid_username_short_password",
-            "long_username_long_password",
-            "invalid_username_format",
-            "short_password",
-            "none_password",
-            "none_username",
-        ],
-    )
-    async def test_create_multiple_users(
-        self,
-        api_client: AsyncClient,
-        username: str,
-        password: str,
-        expected,
-    ):
+    async def test_create_multiple_users(self, api_client: AsyncClient):
         """Test creating multiple users with valid and invalid data"""
-        response = await api_client.post(
-            base_endpoint, json={"username": username, "password": password}
-        )
+        for case, username, password, expected in user_creation_cases:
+            response = await api_client.post(
+                base_endpoint,
+                json={"username": username, "password": password},
+            )
 
-        assert response.status_code == expected
+            assert response.status_code == expected, case
 
 
 @pytest.mark.anyio
@@ -270,10 +309,10 @@ class TestUserUpdateEndpoint:
     """Tests for the user update endpoint."""
 
     async def test_update_user_by_id(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test the update of a user by their ID."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         response = await api_client.put(
@@ -308,10 +347,10 @@ class TestUserUpdateEndpoint:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
     async def test_update_user_with_short_password(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test updating a user with a short password."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         response = await api_client.put(
@@ -323,14 +362,14 @@ class TestUserUpdateEndpoint:
 
         detail = response.json().get("detail")
         min_length = detail[0].get("ctx").get("min_length")
-        assert min_length == settings.minimum_password_length
+        assert min_length == get_settings().minimum_password_length
 
     # do the same tests but with the username as the identifier
     async def test_update_user_by_username(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test updating a user by their username."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         old_username = user.username
@@ -354,6 +393,97 @@ class TestUserUpdateEndpoint:
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    async def test_update_cached_user(
+        self, api_client: AsyncClient, class_jdoe_user
+    ):
+        """Test that updating a user replaces their cached snapshots."""
+        user = class_jdoe_user
+
+        # read the user once by each key so that both get cached
+        response = await api_client.get(f"{base_endpoint}/{user.id}")
+        assert response.status_code == status.HTTP_200_OK
+        response = await api_client.get(
+            base_endpoint, params={"username": user.username}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await api_client.put(
+            f"{base_endpoint}/{user.id}",
+            json={"username": "jdoe_updated", "password": "new_password"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await api_client.get(f"{base_endpoint}/{user.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["username"] == "jdoe_updated"
+
+        response = await api_client.get(
+            base_endpoint, params={"username": "jdoe"}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_update_to_taken_username(
+        self, session: AsyncSession, make_user, class_jdoe_user
+    ):
+        """
+        Test that renaming a user to a taken username fails with the
+        database's IntegrityError rather than an error from the cache
+        eviction that follows the failed commit.
+        """
+        await make_user(username="taken")
+
+        with pytest.raises(IntegrityError):
+            await crud_user.update(
+                db=session,
+                user_id=str(class_jdoe_user.id),
+                schema=schemas.UserUpdate(
+                    username="taken", password="new_password"
+                ),
+                by="id",
+            )
+
+    async def test_read_racing_an_update_is_not_cached(
+        self, session: AsyncSession, class_jdoe_user, monkeypatch
+    ):
+        """
+        Test that a read which fetched a user before an update committed
+        does not cache what it read once the update is over.
+        """
+        user = class_jdoe_user
+        fetched, resume = anyio.Event(), anyio.Event()
+
+        async def get_by_id(**kwargs):
+            # the row as it was read before the update
+            row = schemas.User.model_validate(user)
+            fetched.set()
+            await resume.wait()
+            return row
+
+        monkeypatch.setattr(crud_user, "get_by_id", get_by_id)
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(
+                    lambda: crud_user.read_by_id(
+                        user_id=str(user.id), db=session
+                    )
+                )
+                await fetched.wait()
+                # looked up by username, as get_by_id is held up
+                await crud_user.update(
+                    db=session,
+                    user_id=user.username,
+                    schema=schemas.UserUpdate(
+                        username="jdoe_updated", password="new_password"
+                    ),
+                    by="username",
+                )
+                resume.set()
+
+            assert ("id", user.id) not in crud_user.cache
+            assert ("username", "jdoe") not in crud_user.cache
+        finally:
+            crud_user.cache.clear()
+
     async def test_update_non_existent_user_by_username(
         self, api_client: AsyncClient
     ):
@@ -371,10 +501,10 @@ class TestUserDeletionEndpoint:
     """Tests for the user deletion endpoint."""
 
     async def test_delete_user_by_id(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test the deletion of a user by their ID."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         response = await api_client.delete(f"{base_endpoint}/{user.id}")
@@ -386,10 +516,10 @@ class TestUserDeletionEndpoint:
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
     async def test_delete_user_by_username(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test the deletion of a user by their username."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         response = await api_client.delete(
@@ -404,11 +534,35 @@ class TestUserDeletionEndpoint:
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    async def test_delete_cached_user(
+        self, api_client: AsyncClient, class_jdoe_user
+    ):
+        """Test that a deleted user is no longer served from the cache."""
+        user = class_jdoe_user
+
+        # read the user once by each key so that both get cached
+        response = await api_client.get(f"{base_endpoint}/{user.id}")
+        assert response.status_code == status.HTTP_200_OK
+        response = await api_client.get(
+            base_endpoint, params={"username": user.username}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await api_client.delete(f"{base_endpoint}/{user.id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = await api_client.get(f"{base_endpoint}/{user.id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = await api_client.get(
+            base_endpoint, params={"username": user.username}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     async def test_delete_non_existent_user(
-        self, api_client: AsyncClient, create_jdoe_user
+        self, api_client: AsyncClient, class_jdoe_user
     ):
         """Test the deletion of a user that does not exist."""
-        user = create_jdoe_user
+        user = class_jdoe_user
         assert user is not None
 
         response = await api_client.delete(f"{base_endpoint}/{str(uuid4())}")
@@ -418,3 +572,13 @@ class TestUserDeletionEndpoint:
         """Test the deletion of a user with an invalid ID."""
         response = await api_client.delete(f"{base_endpoint}/invalid_id")
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_user_response_uses_orjson():
+    """Test that the users endpoints encode with the app's default class."""
+    response = user_response(message="OK", status_code=200, data=[])
+
+    assert isinstance(response, ORJSONResponse)
+    assert response.body == orjson.dumps(
+        {"message": "OK", "status_code": 200, "data": []}
+    )
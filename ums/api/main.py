@@ -1,18 +1,24 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import APIRouter, FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 
-from ums import schemas
+from ums import database, schemas
 from ums.api.routers import users
-from ums.config import settings
+from ums.config import get_settings
 
-if settings.dev:
+if get_settings().dev:
     servers = {
         "url": "http://localhost:8000",
         "description": "Local development server",
     }
 else:
-    servers = {"url": settings.prod_url, "description": "Production server"}
+    servers = {
+        "url": get_settings().prod_url,
+        "description": "Production server",
+    }
 
 description = """
 This User Management System provides basic functionality to manage users
@@ -21,12 +27,27 @@ listed. Users can also be created, updated, and deleted.
 """
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keeps the database connections alive while the app is running."""
+    keep_alive = asyncio.create_task(database.keep_alive())
+
+    yield
+
+    keep_alive.cancel()
+    try:
+        with suppress(asyncio.CancelledError):
+            await keep_alive
+    finally:
+        await database.engine.dispose()
+
+
 app = FastAPI(
     title="User Management System REST APIs",
     summary="A simple User Management System",
     description=description,
-    docs_url="/api" if settings.dev else None,
-    redoc_url="/api/docs" if settings.dev else None,
+    docs_url="/api" if get_settings().dev else None,
+    redoc_url="/api/docs" if get_settings().dev else None,
     openapi_tags=[
         {"name": "Users", "description": "Operations related to users"},
         {
@@ -41,6 +62,8 @@ app = FastAPI(
     },
     version="v1.0",
     servers=[servers],
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -80,3 +103,6 @@ async def redirect_to_docs():
 
 router.include_router(users.router)
 app.include_router(router)
+
+# build the OpenAPI schema now so the first request does not pay for it
+app.openapi()
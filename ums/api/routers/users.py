@@ -1,10 +1,12 @@
 from typing import Optional
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, status
+from fastapi.responses import ORJSONResponse
 
 from ums import schemas
 from ums.api.deps import (
     DBSessionDependency,
+    OptionalUsernameDependency,
     UserIdDependency,
     UsernameDependency,
 )
@@ -13,15 +15,32 @@ from ums.crud import crud_user
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
+def user_response(
+    *, message: str, status_code: int, data
+) -> ORJSONResponse:
+    """
+    Builds the response of a users endpoint.
+
+    The data is validated into the response schema once and encoded with
+    orjson, the app's default serialiser. FastAPI returns a `Response` as
+    is, skipping the second validation and serialization it would perform
+    for `response_model`, which is still declared for the documentation.
+    """
+    content = schemas.UserResponse.model_validate(
+        {"message": message, "status_code": status_code, "data": data},
+        from_attributes=True,
+    )
+    return ORJSONResponse(
+        content=content.model_dump(mode="json"), status_code=status_code
+    )
+
+
 @router.post(
     "",
     response_model=schemas.UserResponse,
     summary="Create a user",
     status_code=status.HTTP_201_CREATED,
-    responses={
-        **schemas.user_created_response,
-        **schemas.unprocessable_entity,
-    },
+    responses=schemas.create_user_responses,
     operation_id="create_user",
 )
 async def create_user(db: DBSessionDependency, user: schemas.UserCreate):
@@ -30,19 +49,19 @@ async def create_user(db: DBSessionDependency, user: schemas.UserCreate):
     system. It accepts user data in the request body, i.e., `username` and
     `password`, and any additional profile information.
     """
-    user_obj = crud_user.create(db=db, schema=user)
-    return {
-        "message": "User created successfully",
-        "status_code": status.HTTP_201_CREATED,
-        "data": user_obj,
-    }
+    user_obj = await crud_user.create(db=db, schema=user)
+    return user_response(
+        message="User created successfully",
+        status_code=status.HTTP_201_CREATED,
+        data=user_obj,
+    )
 
 
 @router.get(
     "/{user_id}",
     response_model=schemas.UserResponse,
     summary="Retrieve a user by their id",
-    responses={**schemas.user_retrieved_response, **schemas.user_not_found},
+    responses=schemas.retrieve_user_responses,
     operation_id="get_user_by_id",
 )
 async def get_user_by_id(
@@ -54,26 +73,24 @@ async def get_user_by_id(
     user ID. It is designed to provide detailed user information by querying
     the database with the specified user ID.
     """
-    user_obj = crud_user.get_by_id(db=db, user_id=user_id)
-    return {
-        "message": "User data retrieval successful",
-        "status_code": status.HTTP_200_OK,
-        "data": user_obj,
-    }
+    user_obj = await crud_user.read_by_id(db=db, user_id=user_id)
+    return user_response(
+        message="User data retrieval successful",
+        status_code=status.HTTP_200_OK,
+        data=user_obj,
+    )
 
 
 @router.get(
     "",
     response_model=schemas.UserResponse,
     summary="Retrieve all users or a user by their username",
-    responses={**schemas.users_retrieved_response, **schemas.user_not_found},
+    responses=schemas.retrieve_users_responses,
     operation_id="get_users",
 )
 async def get_users(
     db: DBSessionDependency,
-    username: Optional[str] = Query(
-        None, description="The username of the user"
-    ),
+    username: Optional[str] = OptionalUsernameDependency,
     skip: int = 0,
     limit: int = 25,
 ):
@@ -87,15 +104,15 @@ async def get_users(
     up to 100 users per request.
     """
     if username:
-        user_data = crud_user.get_by_username(username=username, db=db)
+        user_data = await crud_user.read_by_username(username=username, db=db)
     else:
-        user_data = crud_user.get_all(db=db, skip=skip, limit=limit)
+        user_data = await crud_user.get_all(db=db, skip=skip, limit=limit)
 
-    return {
-        "message": "User data retrieval successful",
-        "status_code": status.HTTP_200_OK,
-        "data": user_data,
-    }
+    return user_response(
+        message="User data retrieval successful",
+        status_code=status.HTTP_200_OK,
+        data=user_data,
+    )
 
 
 @router.put(
@@ -103,11 +120,7 @@ async def get_users(
     response_model=schemas.UserResponse,
     response_description="User updated successfully",
     summary="Update a user by their id",
-    responses={
-        **schemas.user_updated_response,
-        **schemas.user_not_found,
-        **schemas.unprocessable_entity,
-    },
+    responses=schemas.update_user_responses,
     operation_id="update_user_by_id",
 )
 async def update_user_by_id(
@@ -125,14 +138,14 @@ async def update_user_by_id(
     and send the request. If do want to update the password, you can pass the
     `password` field along with the `username` field.
     """
-    updated_user = crud_user.update(
+    updated_user = await crud_user.update(
         db=db, user_id=user_id, schema=user, by="id"
     )
-    return {
-        "message": "User updated successfully",
-        "status_code": status.HTTP_200_OK,
-        "data": updated_user,
-    }
+    return user_response(
+        message="User updated successfully",
+        status_code=status.HTTP_200_OK,
+        data=updated_user,
+    )
 
 
 @router.put(
@@ -140,11 +153,7 @@ async def update_user_by_id(
     response_model=schemas.UserResponse,
     response_description="User updated successfully",
     summary="Update a user by their username",
-    responses={
-        **schemas.user_updated_response,
-        **schemas.user_not_found,
-        **schemas.unprocessable_entity,
-    },
+    responses=schemas.update_user_responses,
     operation_id="update_user_by_username",
 )
 async def update_user_by_username(
@@ -162,14 +171,14 @@ async def update_user_by_username(
     and send the request. If do want to update the password, you can pass the
     `password` field along with the `username` field.
     """
-    updated_user = crud_user.update(
+    updated_user = await crud_user.update(
         db=db, user_id=username, schema=user, by="username"
     )
-    return {
-        "message": "User updated successfully",
-        "status_code": status.HTTP_200_OK,
-        "data": updated_user,
-    }
+    return user_response(
+        message="User updated successfully",
+        status_code=status.HTTP_200_OK,
+        data=updated_user,
+    )
 
 
 @router.delete(
@@ -177,7 +186,7 @@ async def update_user_by_username(
     status_code=status.HTTP_204_NO_CONTENT,
     response_description="User deleted successfully",
     summary="Delete a user by their id",
-    responses={**schemas.user_not_found},
+    responses=schemas.delete_user_responses,
     operation_id="delete_user_by_id",
 )
 async def delete_user_by_id(
@@ -188,7 +197,7 @@ async def delete_user_by_id(
     and cannot be undone. Please be sure you want to delete the user before
     sending the request.
     """
-    crud_user.delete(user_id=user_id, db=db, by="id")
+    await crud_user.delete(user_id=user_id, db=db, by="id")
 
 
 @router.delete(
@@ -196,9 +205,7 @@ async def delete_user_by_id(
     status_code=status.HTTP_204_NO_CONTENT,
     response_description="User deleted successfully",
     summary="Delete a user by their username",
-    responses={
-        **schemas.user_not_found,
-    },
+    responses=schemas.delete_user_responses,
     operation_id="delete_user_by_username",
 )
 async def delete_user_by_username(
@@ -209,4 +216,4 @@ async def delete_user_by_username(
     operation and cannot be undone. Please be sure you want to delete the user
     before sending the request.
     """
-    crud_user.delete(user_id=username, db=db, by="username")
+    await crud_user.delete(user_id=username, db=db, by="username")
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -17,12 +19,28 @@ class Settings(BaseSettings):
     - **db_host**: The host of the database (default is "localhost").
     - **db_password**: The password for the database connection.
     - **db_port**: The port for the database connection.
+    - **db_pool_size**: The number of connections each worker process keeps
+    open to the database (default is 10).
+    - **db_max_overflow**: The number of extra connections a worker may open
+    on top of the pool during bursts (default is 10).
+    - **db_pool_timeout**: The number of seconds to wait for a free
+    connection before giving up (default is 30).
+    - **db_pool_recycle**: The age in seconds after which pooled connections
+    are replaced (default is 1800).
+    - **db_keepalive_interval**: The number of seconds between the pings
+    that keep pooled connections alive (default is 60).
     - **dev**: A flag indicating whether the system is in development mode
     (default is False).
     - **minimum_password_length**: The minimum required length for user
     passwords (default is 8).
     - **maximum_password_length**: The maximum allowed length for user
     passwords (default is 15).
+    - **password_hash_rounds**: The bcrypt work factor used when hashing
+    passwords (default is 12).
+    - **user_cache_size**: The maximum number of users each worker process
+    keeps cached for reads (default is 1024).
+    - **user_cache_ttl**: The number of seconds a cached user is served
+    before being read from the database again (default is 30).
     """
 
     db_user: str
@@ -30,12 +48,33 @@ class Settings(BaseSettings):
     db_host: str = "localhost"
     db_password: str
     db_port: int
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_keepalive_interval: int = 60
     dev: bool = False
     minimum_password_length: int = 8
     maximum_password_length: int = 15
+    password_hash_rounds: int = 12
+    user_cache_size: int = 1024
+    user_cache_ttl: int = 30
     prod_url: str | None = "http://localhost:8000"
 
     model_config = ConfigDict(env_file=".env")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Returns the settings, reading the environment and the .env file only the
+    first time it is called.
+
+    Explanation:
+    After `get_settings.cache_clear()` the settings are loaded again on the
+    next call, which only affects values read at runtime, such as the
+    keepalive interval. The engine, the password hashing and length rules
+    and the app's documentation URLs are set up from the settings once, when
+    their modules are imported.
+    """
+    return Settings()
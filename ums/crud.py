@@ -1,10 +1,14 @@
+from typing import Sequence
 from uuid import UUID
 
+from cachetools import TTLCache
 from fastapi import HTTPException, status
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Query, Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ums import models, schemas
+from ums.config import get_settings
 
 
 class UserCrud:
@@ -13,18 +17,102 @@ class UserCrud:
     def __init__(self, model: models.User = models.User):
         self.model = model
         self.model_name = model.__name__.lower()
+        # only the columns exposed by the response schema, leaving out
+        # the password hash
+        self.public_columns = tuple(
+            getattr(model, name) for name in schemas.User.model_fields
+        )
+        self.by_username = (
+            select(model)
+            .where(model.username == bindparam("username"))
+            .limit(1)
+        )
+        self.public_by_username = (
+            select(*self.public_columns)
+            .where(model.username == bindparam("username"))
+            .limit(1)
+        )
+        # snapshots of recently read users, keyed by ("id", UUID) and
+        # ("username", str); only touched from the event loop, so no lock
+        settings = get_settings()
+        self.cache = TTLCache(
+            maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl
+        )
+        # bumped by every eviction; a read that saw an older value may have
+        # fetched the row before a write committed, so it is not cached
+        self.writes = 0
+        # the errors are shared between requests, and every raise would add
+        # its frames to the traceback left by the previous one, so they are
+        # always raised with that traceback dropped
         self.not_found_error = HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"{self.model_name} not found",
         )
+        self.invalid_id_error = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"invalid {self.model_name} id",
+        )
+        self.internal_error = HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "message": "An error while performing this action",
+                "next_steps": "If the error persists, please contact "
+                "the system administrator.",
+            },
+        )
 
-    def get_by_id(self, *, user_id: str, db: Session) -> models.User:
+    def __parse_id(self, user_id: str) -> UUID:
+        """
+        Parses a user ID.
+
+        Args:
+            user_id (str): The ID to parse.
+
+        Raises:
+            HTTPException: Error 400 is raised if the ID is not a valid UUID.
+
+        Returns:
+            UUID: The parsed ID.
+        """
+        try:
+            return UUID(user_id)
+        except ValueError:
+            pass
+
+        # raised outside the except block to keep this request's ValueError
+        # out of the shared error's __context__
+        raise self.invalid_id_error.with_traceback(None)
+
+    def __cache_user(
+        self, user: models.User | Row, *, writes: int
+    ) -> schemas.User:
+        """
+        Caches a snapshot of a user under both their ID and username, unless
+        a write happened since the read began, given by the `writes` count it
+        started with.
+        """
+        snapshot = schemas.User.model_validate(user)
+        if writes == self.writes:
+            self.cache[("id", user.id)] = snapshot
+            self.cache[("username", user.username)] = snapshot
+        return snapshot
+
+    def __evict_user(self, user_id: UUID, *usernames: str):
+        """Removes the cached snapshots of a user once they have changed."""
+        self.writes += 1
+        self.cache.pop(("id", user_id), None)
+        for username in usernames:
+            self.cache.pop(("username", username), None)
+
+    async def get_by_id(
+        self, *, user_id: str, db: AsyncSession
+    ) -> models.User:
         """
         Retrieves a user by their ID.
 
         Args:
             user_id (str): The ID of the user to retrieve
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
 
         Raises:
             HTTPException: Error 404 is raised if the user does not exist. In
@@ -33,45 +121,98 @@ class UserCrud:
         Returns:
             models.User: The user with the requested ID.
         """
-        try:
-            UUID(user_id)
-        except ValueError as error:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"invalid {self.model_name} id",
-            ) from error
-        if user := db.get(self.model, user_id):
+        if user := await db.get(self.model, self.__parse_id(user_id)):
             return user
 
-        raise self.not_found_error
+        raise self.not_found_error.with_traceback(None)
 
-    def get_by_username(self, *, username: str, db: Session) -> models.User:
-        if user := db.query(self.model).filter_by(username=username).first():
+    async def get_by_username(
+        self, *, username: str, db: AsyncSession
+    ) -> models.User:
+        if user := await db.scalar(
+            self.by_username, {"username": username}
+        ):
             return user
 
-        raise self.not_found_error
+        raise self.not_found_error.with_traceback(None)
 
-    def get_all(
-        self, *, db: Session, skip: int = 0, limit: int = 25
-    ) -> Query:
+    async def read_by_id(
+        self, *, user_id: str, db: AsyncSession
+    ) -> schemas.User:
+        """
+        Retrieves a read-only snapshot of a user by their ID, served from the
+        cache when the user was read recently.
+
+        Args:
+            user_id (str): The ID of the user to retrieve
+            db (AsyncSession): The database session instance
+
+        Raises:
+            HTTPException: Error 404 is raised if the user does not exist. In
+            the event the ID provided is not valid, error 400 is raised.
+
+        Returns:
+            schemas.User: The user with the requested ID.
+        """
+        if user := self.cache.get(("id", self.__parse_id(user_id))):
+            return user
+
+        writes = self.writes
+        user = await self.get_by_id(user_id=user_id, db=db)
+        return self.__cache_user(user, writes=writes)
+
+    async def read_by_username(
+        self, *, username: str, db: AsyncSession
+    ) -> schemas.User:
+        """
+        Retrieves a read-only snapshot of a user by their username, served
+        from the cache when the user was read recently.
+
+        Args:
+            username (str): The username of the user to retrieve
+            db (AsyncSession): The database session instance
+
+        Raises:
+            HTTPException: Error 404 is raised if the user does not exist.
+
+        Returns:
+            schemas.User: The user with the requested username.
+        """
+        if user := self.cache.get(("username", username)):
+            return user
+
+        writes = self.writes
+        # only the public columns are read, which the covering index holds
+        result = await db.execute(
+            self.public_by_username, {"username": username}
+        )
+        if user := result.first():
+            return self.__cache_user(user, writes=writes)
+
+        raise self.not_found_error.with_traceback(None)
+
+    async def get_all(
+        self, *, db: AsyncSession, skip: int = 0, limit: int = 25
+    ) -> Sequence[Row]:
         """
         Retrieves all users, but the results are paginated.
 
         Args:
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
             skip (int, optional): The starting point for the data.
             Defaults to 0.
             limit (int, optional): The number of retrievable users.
             Defaults to 25.
 
         Returns:
-            Query: The result of all users.
+            Sequence[Row]: The public columns of all users.
         """
         limit = min(limit, 100)
-        return db.query(self.model).offset(skip).limit(limit)
+        statement = select(*self.public_columns).offset(skip).limit(limit)
+        return (await db.execute(statement)).all()
 
-    def __get_user(
-        self, *, by: str, user_id: str, db: Session
+    async def __get_user(
+        self, *, by: str, user_id: str, db: AsyncSession
     ) -> models.User:
         """
         Retrieves a user by their ID or username.
@@ -79,7 +220,7 @@ class UserCrud:
         Args:
             by (str): The type of data to use for the search.
             user_id (str): The ID or username of the user to retrieve
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
 
         Raises:
             HTTPException: Error 404 is raised if the user does not exist.
@@ -89,27 +230,20 @@ class UserCrud:
         """
         match by:
             case "id":
-                return self.get_by_id(user_id=user_id, db=db)
+                return await self.get_by_id(user_id=user_id, db=db)
             case "username":
-                return self.get_by_username(username=user_id, db=db)
+                return await self.get_by_username(username=user_id, db=db)
             case _:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail={
-                        "message": "An error while performing this action",
-                        "next_steps": "If the error persists, please contact "
-                        "the system administrator.",
-                    },
-                )
-
-    def create(
-        self, *, db: Session, schema: schemas.UserCreate
+                raise self.internal_error.with_traceback(None)
+
+    async def create(
+        self, *, db: AsyncSession, schema: schemas.UserCreate
     ) -> models.User:
         """
         Creates a new user.
 
         Args:
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
             schema (schemas.UserCreateUpdate): The user schema to use
 
         Raises:
@@ -119,17 +253,17 @@ class UserCrud:
             models.User: A new user instance.
         """
         try:
-            return self.model(**schema.model_dump()).save(db=db)
+            return await self.model(**schema.model_dump()).save(db=db)
         except IntegrityError as e:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="user already exists",
             ) from e
 
-    def update(
+    async def update(
         self,
         *,
-        db: Session,
+        db: AsyncSession,
         user_id: str,
         schema: schemas.UserUpdate,
         by: str,
@@ -138,7 +272,7 @@ class UserCrud:
         Updates a user.
 
         Args:
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
             user_id (str): The ID of the user to update
             schema (schemas.UserCreateUpdate): The user schema to use
 
@@ -148,16 +282,25 @@ class UserCrud:
         Returns:
             models.User: The updated user instance.
         """
-        user = self.__get_user(by=by, user_id=user_id, db=db)
-
-        return user.update(**schema.model_dump(exclude_unset=True), db=db)
-
-    def delete(self, *, db: Session, user_id: str, by: str) -> models.User:
+        user = await self.__get_user(by=by, user_id=user_id, db=db)
+        # taken before the write, as the user can't be read once a failed
+        # commit has left the session to be rolled back
+        keys = (user.id, user.username, schema.username)
+        try:
+            return await user.update_from(schema, db=db)
+        finally:
+            # evicting once the write is over, so that neither a read
+            # finishing before it nor one that raced it stays cached
+            self.__evict_user(*keys)
+
+    async def delete(
+        self, *, db: AsyncSession, user_id: str, by: str
+    ) -> models.User:
         """
         Deletes a user.
 
         Args:
-            db (Session): The database session instance
+            db (AsyncSession): The database session instance
             user_id (str): The ID of the user to delete
 
         Raises:
@@ -166,8 +309,13 @@ class UserCrud:
         Returns:
             models.User: The deleted user instance.
         """
-        user = self.__get_user(by=by, user_id=user_id, db=db)
-        user.delete(db=db)
+        user = await self.__get_user(by=by, user_id=user_id, db=db)
+        keys = (user.id, user.username)
+        try:
+            await user.delete(db=db)
+        finally:
+            # as in update
+            self.__evict_user(*keys)
 
 
 crud_user = UserCrud()
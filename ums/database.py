@@ -1,53 +1,106 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, declarative_base, sessionmaker
+import asyncio
+import logging
+
+from anyio import to_thread
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import declarative_base
 from passlib.context import CryptContext
-from ums.config import settings
+from ums.config import get_settings
 
+logger = logging.getLogger(__name__)
 
-def hash_password(password: str):
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=get_settings().password_hash_rounds,
+)
+
+
+def hash_password(password: str) -> str:
     """Hashes a password."""
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     return pwd_context.hash(password)
 
 
-SQLALCHEMY_DATABASE_URL = (
-    "postgresql://"
-    f"{settings.db_user}:{settings.db_password}@"
-    f"{settings.db_host}:{settings.db_port}/{settings.db_name}"
-)
+def get_database_url() -> str:
+    """Returns the URL of the application database."""
+    settings = get_settings()
+    return (
+        "postgresql+asyncpg://"
+        f"{settings.db_user}:{settings.db_password}@"
+        f"{settings.db_host}:{settings.db_port}/{settings.db_name}"
+    )
 
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = get_database_url()
 
-DBSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# every worker process holds up to db_pool_size + db_max_overflow
+# connections, so keep that times the number of workers below the server's
+# max_connections
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=get_settings().db_pool_size,
+    max_overflow=get_settings().db_max_overflow,
+    pool_timeout=get_settings().db_pool_timeout,
+    pool_recycle=get_settings().db_pool_recycle,
+)
+
+DBSession = async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Yields a database connection for ORM transactions."""
-    db = DBSession()
-    try:
+    async with DBSession() as db:
         yield db
-    finally:
-        db.close()
 
 
-def save(model_instance, *, db: Session):
+async def keep_alive():
+    """
+    Pings the database periodically instead of before every checkout.
+
+    Explanation:
+    A ping that fails on a dropped connection makes SQLAlchemy invalidate
+    the whole pool, so stale connections get replaced within one interval
+    rather than on the request path.
+    """
+    while True:
+        await asyncio.sleep(get_settings().db_keepalive_interval)
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        except Exception:
+            # the driver raises plain OSErrors when the server is unreachable,
+            # and if this task died the pool would never be pinged again
+            logger.exception("Failed to ping the database")
+
+
+async def save(model_instance, *, db: AsyncSession):
     """Saves an instance of any object to the database."""
     if (
         hasattr(model_instance, "password")
         and model_instance.password is not None
     ):
-        model_instance.password = hash_password(model_instance.password)
+        # bcrypt is deliberately slow, so keep it off the event loop
+        model_instance.password = await to_thread.run_sync(
+            hash_password, model_instance.password
+        )
     db.add(model_instance)
-    db.commit()
-    db.refresh(model_instance)
+    await db.commit()
 
     return model_instance
 
 
-def delete(model_instance, *, db: Session):
+async def delete(model_instance, *, db: AsyncSession):
     """Delete an instance of an object from the database."""
-    db.delete(model_instance)
-    db.commit()
+    await db.delete(model_instance)
+    await db.commit()
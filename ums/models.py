@@ -1,9 +1,11 @@
 from datetime import datetime, timezone
 from uuid import uuid4
 
+import pydantic
 import sqlalchemy
-from sqlalchemy import TIMESTAMP, Boolean, String, text
-from sqlalchemy.orm import Mapped, Session, mapped_column
+from sqlalchemy import TIMESTAMP, Boolean, Index, String, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
 
 from ums import database
 from ums.database import Base
@@ -12,6 +14,9 @@ from ums.database import Base
 class BaseModel:
     """Base model."""
 
+    # fetch server generated defaults with RETURNING as part of the INSERT
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Mapped[sqlalchemy.Uuid] = mapped_column(
         sqlalchemy.Uuid,
         primary_key=True,
@@ -20,36 +25,55 @@ class BaseModel:
         index=True,
     )
     created_at: Mapped[TIMESTAMP] = mapped_column(
-        TIMESTAMP(timezone=True), server_default=text("now()")
+        TIMESTAMP(timezone=True), server_default=func.now()
     )
     updated_at: Mapped[TIMESTAMP] = mapped_column(
         TIMESTAMP(timezone=True),
-        server_default=text("now()"),
+        server_default=func.now(),
         onupdate=datetime.now(timezone.utc),
     )
 
-    def save(self, *, db: Session):
+    async def save(self, *, db: AsyncSession):
         """Saves the current object to the database."""
-        return database.save(self, db=db)
+        return await database.save(self, db=db)
 
-    def delete(self, *, db: Session):
+    async def delete(self, *, db: AsyncSession):
         """Deletes the current object from the database."""
-        database.delete(self, db=db)
+        await database.delete(self, db=db)
 
-    def update(self, db: Session, **kwargs):
+    async def update(self, db: AsyncSession, **kwargs):
         """Updates the current object in the database."""
         for key, value in kwargs.items():
             setattr(self, key, value)
 
-        return self.save(db=db)
+        return await self.save(db=db)
+
+    async def update_from(
+        self, schema: pydantic.BaseModel, *, db: AsyncSession
+    ):
+        """Updates the current object with the fields set on a schema."""
+        for name in schema.model_fields_set:
+            setattr(self, name, getattr(schema, name))
+
+        return await self.save(db=db)
 
 
 class User(Base, BaseModel):
     """Model for users."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # lets PostgreSQL answer username lookups for the public columns from
+        # the index alone, without visiting the table
+        Index(
+            "ix_users_username_covering",
+            "username",
+            unique=True,
+            postgresql_include=["id", "is_active", "created_at", "updated_at"],
+        ),
+    )
 
-    username: Mapped[str] = mapped_column(String(20), index=True, unique=True)
+    username: Mapped[str] = mapped_column(String(20))
     password: Mapped[str] = mapped_column(String)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
@@ -10,7 +10,7 @@ from pydantic import (
     field_validator,
 )
 
-from ums.config import settings
+from ums.config import get_settings
 
 
 def create_response_example(
@@ -119,6 +119,18 @@ unprocessable_entity = {
 }
 
 
+# the additional responses documented for each kind of users endpoint
+create_user_responses = {**user_created_response, **unprocessable_entity}
+retrieve_user_responses = {**user_retrieved_response, **user_not_found}
+retrieve_users_responses = {**users_retrieved_response, **user_not_found}
+update_user_responses = {
+    **user_updated_response,
+    **user_not_found,
+    **unprocessable_entity,
+}
+delete_user_responses = user_not_found
+
+
 class UserBase(BaseModel):
     """Schema for validating and creating users."""
 
@@ -176,8 +188,8 @@ class UserCreate(UserBase):
 
     password: str = Field(
         ...,
-        min_length=settings.minimum_password_length,
-        max_length=settings.maximum_password_length,
+        min_length=get_settings().minimum_password_length,
+        max_length=get_settings().maximum_password_length,
     )
 
 
@@ -202,8 +214,8 @@ class UserUpdate(UserBase):
 
     password: Optional[str] = Field(
         None,
-        min_length=settings.minimum_password_length,
-        max_length=settings.maximum_password_length,
+        min_length=get_settings().minimum_password_length,
+        max_length=get_settings().maximum_password_length,
     )
 
 
@@ -220,7 +232,13 @@ class User(UserBase):
     - **updated_at**: The timestamp when the user was last updated.
     """
 
-    model_config = ConfigDict(from_attributes=True)
+    # users are built from trusted database rows, so skip the input checks
+    # on assignment and when an instance is validated again
+    model_config = ConfigDict(
+        from_attributes=True,
+        validate_assignment=False,
+        revalidate_instances="never",
+    )
 
     id: UUID
     is_active: bool